@@ -2,6 +2,7 @@
 
 import tempfile
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -290,12 +291,9 @@ class CladeTime:
         # drop any clade-related columns from sequence_metadata (if any exists, it will be replaced
         # by the results of the clade assignment)
         logger.info("Removing current sequence assignments from metadata")
+        standard_fields = set(self._config.nextstrain_standard_metadata_fields)
         sequence_metadata = sequence_metadata.drop(
-            [
-                col
-                for col in sequence_metadata.collect_schema().names()
-                if col not in self._config.nextstrain_standard_metadata_fields
-            ]
+            [col for col in sequence_metadata.collect_schema().names() if col not in standard_fields]
         )
 
         # from the sequence metadata, derive a set of sequence IDs (the "strain")
@@ -330,22 +328,31 @@ class CladeTime:
             )
 
         tree = Tree(self.tree_as_of, self.url_sequence)
+        # Tree.ncov_metadata requests the metadata from S3 on every access, so use the
+        # copy the Tree fetched when it was created
+        ncov_metadata = tree._ncov_metadata
 
         with tempfile.TemporaryDirectory() as tmpdir:
-            filtered_sequences = sequence.filter(ids, self.url_sequence, Path(tmpdir))
-            nextclade_dataset = _get_nextclade_dataset(
-                tree.ncov_metadata.get("nextclade_version_num", ""),
-                tree.ncov_metadata.get("nextclade_dataset_name", "").lower(),
-                tree.ncov_metadata.get("nextclade_dataset_version", ""),
-                Path(tmpdir),
-            )
+            # downloading and filtering the sequence file is independent of retrieving the
+            # Nextclade dataset, so run both at once and wait for the slower one
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                sequences_future = executor.submit(sequence.filter, ids, self.url_sequence, Path(tmpdir))
+                dataset_future = executor.submit(
+                    _get_nextclade_dataset,
+                    ncov_metadata.get("nextclade_version_num", ""),
+                    ncov_metadata.get("nextclade_dataset_name", "").lower(),
+                    ncov_metadata.get("nextclade_dataset_version", ""),
+                    Path(tmpdir),
+                )
+                filtered_sequences = sequences_future.result()
+                nextclade_dataset = dataset_future.result()
             logger.info(
                 "Assigning clades",
                 sequences_to_assign=len(ids),
-                nextclade_dataset_version=tree.ncov_metadata.get("nextclade_dataset_version"),
+                nextclade_dataset_version=ncov_metadata.get("nextclade_dataset_version"),
             )
             assignments = _get_clade_assignments(
-                tree.ncov_metadata.get("nextclade_version_num", ""), filtered_sequences, nextclade_dataset, output_file
+                ncov_metadata.get("nextclade_version_num", ""), filtered_sequences, nextclade_dataset, output_file
             )
             assigned_clades_df = pl.read_csv(assignments, separator="\t", infer_schema_length=100000)
             # get a count of non-null clade_nextstrain values
@@ -357,7 +364,7 @@ class CladeTime:
                 sequences_to_assign=sequence_count,
                 sequences_assigned=assigned_sequence_count,
                 assignment_file=assignments,
-                nextclade_dataset=tree.ncov_metadata.get("nextclade_dataset_version"),
+                nextclade_dataset=ncov_metadata.get("nextclade_dataset_version"),
             )
 
         # join the assigned clades with the original sequence metadata, create a summarized LazyFrame
@@ -375,9 +382,9 @@ class CladeTime:
             "sequences_assigned": assigned_sequence_count,
             "sequence_as_of": self.sequence_as_of,
             "tree_as_of": self.tree_as_of,
-            "nextclade_dataset_version": tree.ncov_metadata.get("nextclade_dataset_version"),
-            "nextclade_dataset_name": tree.ncov_metadata.get("nextclade_dataset_name"),
-            "nextclade_version_num": tree.ncov_metadata.get("nextclade_version_num"),
+            "nextclade_dataset_version": ncov_metadata.get("nextclade_dataset_version"),
+            "nextclade_dataset_name": ncov_metadata.get("nextclade_dataset_name"),
+            "nextclade_version_num": ncov_metadata.get("nextclade_version_num"),
             "assignment_as_of": assignment_date,
         }
         metadata_clades = Clade(meta=metadata, detail=assigned_clades, summary=summarized_clades)
@@ -1,23 +1,28 @@
 """Functions for retrieving and parsing SARS-CoV-2 virus genome data."""
 
+import hashlib
 import lzma
 import os
 import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from io import BytesIO
 from pathlib import Path
+from typing import BinaryIO
 from urllib.parse import urlparse
 
 import biobear as bb
 import polars as pl
 import requests
 import structlog
-import us
+import zstandard as zstd
 from Bio import SeqIO
 from Bio.Seq import Seq
 from Bio.SeqIO import FastaIO
 from Bio.SeqRecord import SeqRecord
 from requests import Session
+from urllib3 import BaseHTTPResponse
 
 from cladetime.types import StateFormat
 from cladetime.util.reference import _get_date
@@ -26,6 +31,89 @@ from cladetime.util.timing import time_function
 
 logger = structlog.get_logger()
 
+# buffer size used when streaming downloads to disk (matches zstd's recommended stream input size)
+_DOWNLOAD_CHUNK_SIZE = 128 * 1024
+# large files that support byte-range requests are downloaded in parallel ranges of this size
+_DOWNLOAD_RANGE_SIZE = 8 * 1024 * 1024
+_DOWNLOAD_MAX_WORKERS = 8
+# maximum size of each block of decompressed output when reading .xz files
+_XZ_MAX_OUTPUT = 8 * 1024 * 1024
+# largest back-reference window accepted when reading .zst files (256 MiB, to allow --long frames)
+_ZSTD_MAX_WINDOW_SIZE = 2 << 27
+
+# Columns that cladetime relies on are always read as strings, regardless of
+# what schema inference makes of the first rows of a metadata file
+_METADATA_SCHEMA_OVERRIDES = {
+    "strain": pl.String,
+    "genbank_accession": pl.String,
+    "date": pl.String,
+    "country": pl.String,
+    "division": pl.String,
+    "location": pl.String,
+    "host": pl.String,
+    "clade_nextstrain": pl.String,
+}
+
+# Name, abbreviation, and FIPS code of the divisions kept by filter_metadata. There are
+# some other odd divisions in the data, but these are 50 states, DC and PR.
+_US_STATES = (
+    ("Alabama", "AL", "01"),
+    ("Alaska", "AK", "02"),
+    ("Arizona", "AZ", "04"),
+    ("Arkansas", "AR", "05"),
+    ("California", "CA", "06"),
+    ("Colorado", "CO", "08"),
+    ("Connecticut", "CT", "09"),
+    ("Delaware", "DE", "10"),
+    ("District of Columbia", "DC", "11"),
+    ("Florida", "FL", "12"),
+    ("Georgia", "GA", "13"),
+    ("Hawaii", "HI", "15"),
+    ("Idaho", "ID", "16"),
+    ("Illinois", "IL", "17"),
+    ("Indiana", "IN", "18"),
+    ("Iowa", "IA", "19"),
+    ("Kansas", "KS", "20"),
+    ("Kentucky", "KY", "21"),
+    ("Louisiana", "LA", "22"),
+    ("Maine", "ME", "23"),
+    ("Maryland", "MD", "24"),
+    ("Massachusetts", "MA", "25"),
+    ("Michigan", "MI", "26"),
+    ("Minnesota", "MN", "27"),
+    ("Mississippi", "MS", "28"),
+    ("Missouri", "MO", "29"),
+    ("Montana", "MT", "30"),
+    ("Nebraska", "NE", "31"),
+    ("Nevada", "NV", "32"),
+    ("New Hampshire", "NH", "33"),
+    ("New Jersey", "NJ", "34"),
+    ("New Mexico", "NM", "35"),
+    ("New York", "NY", "36"),
+    ("North Carolina", "NC", "37"),
+    ("North Dakota", "ND", "38"),
+    ("Ohio", "OH", "39"),
+    ("Oklahoma", "OK", "40"),
+    ("Oregon", "OR", "41"),
+    ("Pennsylvania", "PA", "42"),
+    ("Puerto Rico", "PR", "72"),
+    ("Rhode Island", "RI", "44"),
+    ("South Carolina", "SC", "45"),
+    ("South Dakota", "SD", "46"),
+    ("Tennessee", "TN", "47"),
+    ("Texas", "TX", "48"),
+    ("Utah", "UT", "49"),
+    ("Vermont", "VT", "50"),
+    ("Virginia", "VA", "51"),
+    ("Washington", "WA", "53"),
+    # Nextstrain's metadata uses this name for the District of Columbia
+    ("Washington DC", "DC", "11"),
+    ("West Virginia", "WV", "54"),
+    ("Wisconsin", "WI", "55"),
+    ("Wyoming", "WY", "56"),
+)
+_US_DIVISIONS = pl.Series("division", [name for name, _, _ in _US_STATES])
+
 
 @time_function
 def _download_from_url(
@@ -35,6 +123,14 @@ def _download_from_url(
 ) -> Path:
     """Download a file from the specified URL and save it to data_path.
 
+    Files larger than 8 MiB are downloaded as parallel byte ranges when the
+    server supports them; otherwise the file is streamed in a single request.
+
+    The ETag of each download is saved alongside the file (as
+    <filename>.etag). If the file and its ETag already exist in data_path,
+    the download is skipped when the server reports that the file hasn't
+    changed.
+
     Parameters
     ----------
     session : Session
@@ -53,20 +149,124 @@ def _download_from_url(
     parsed_url = urlparse(url)
     url_filename = os.path.basename(parsed_url.path)
     filename = data_path / url_filename
+    etag_file = filename.with_suffix(f"{filename.suffix}.etag")
 
     data_path.mkdir(parents=True, exist_ok=True)
 
-    with session.get(url, stream=True) as result:
-        result.raise_for_status()
-        with open(filename, "wb") as f:
-            for chunk in result.iter_content(chunk_size=None):
-                f.write(chunk)
+    # if we already have a copy of the file, ask the server to skip it when unchanged
+    headers = {}
+    if filename.exists() and etag_file.exists():
+        headers["If-None-Match"] = etag_file.read_text()
+    # the saved ETag no longer describes the file once we start overwriting it
+    etag_file.unlink(missing_ok=True)
+
+    # if the server supports byte ranges, fetch large files over several connections,
+    # since a single stream's throughput is capped by its congestion window
+    # (stream=True because a HEAD response has no body for requests to read)
+    with session.head(url, headers=headers, allow_redirects=True, stream=True) as head:
+        content_length = int(head.headers.get("Content-Length", 0))
+        etag = head.headers.get("ETag")
+    if head.status_code == 304:
+        logger.info("File not modified, skipping download", path=filename)
+        etag_file.write_text(headers["If-None-Match"])
+        return filename
+    if (
+        head.ok
+        and head.headers.get("Accept-Ranges") == "bytes"
+        and "Content-Encoding" not in head.headers
+        and content_length > _DOWNLOAD_RANGE_SIZE
+        and hasattr(os, "pwrite")
+    ):
+        _download_ranges(session, head.url, filename, content_length, etag)
+    else:
+        with session.get(url, headers=headers, stream=True) as result:
+            result.raise_for_status()
+            if result.status_code == 304:
+                logger.info("File not modified, skipping download", path=filename)
+                etag_file.write_text(headers["If-None-Match"])
+                return filename
+            etag = result.headers.get("ETag")
+            # copy the raw stream to disk in fixed-size blocks, so peak memory is bounded
+            # by the block size rather than by whatever the socket hands back; the session
+            # advertises several content encodings, so let urllib3 decode them on the way
+            result.raw.decode_content = True
+            with open(filename, "wb") as f:
+                # the size on disk is only known in advance if the body isn't encoded
+                if "Content-Encoding" not in result.headers and "Content-Length" in result.headers:
+                    _preallocate(f.fileno(), int(result.headers["Content-Length"]))
+                shutil.copyfileobj(result.raw, f, length=_DOWNLOAD_CHUNK_SIZE)
+                # drop any preallocated space that the download didn't fill
+                f.truncate()
+
+    if etag:
+        etag_file.write_text(etag)
 
     return filename
 
 
+def _download_ranges(session: Session, url: str, filename: Path, content_length: int, etag: str | None = None):
+    """Download a file as parallel byte ranges written directly to their offsets in filename."""
+    ranges = [
+        (start, min(start + _DOWNLOAD_RANGE_SIZE, content_length) - 1)
+        for start in range(0, content_length, _DOWNLOAD_RANGE_SIZE)
+    ]
+
+    fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        _preallocate(fd, content_length)
+        with ThreadPoolExecutor(max_workers=min(_DOWNLOAD_MAX_WORKERS, len(ranges))) as executor:
+            futures = [executor.submit(_download_range, session, url, fd, start, end, etag) for start, end in ranges]
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception:
+                    # don't start the ranges still queued once one has failed
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    raise
+    finally:
+        os.close(fd)
+
+
+def _preallocate(fd: int, size: int):
+    """Size the open file fd to size bytes, reserving its disk space where the platform allows."""
+    if size == 0:
+        # posix_fallocate rejects a zero length, and there is nothing to reserve
+        return
+    if hasattr(os, "posix_fallocate"):
+        try:
+            # allocate the file's extents once instead of extending the file on every write
+            os.posix_fallocate(fd, 0, size)
+            return
+        except OSError as e:
+            # preallocation is only a hint, e.g., some filesystems don't support it
+            logger.warning("Unable to preallocate download file", size=size, error=str(e))
+    os.ftruncate(fd, size)
+
+
+def _download_range(session: Session, url: str, fd: int, start: int, end: int, etag: str | None = None):
+    """Download bytes start-end (inclusive) of url and write them at the same offset of fd."""
+    headers = {"Range": f"bytes={start}-{end}", "Accept-Encoding": "identity"}
+    if etag:
+        # fail rather than stitch together ranges from different versions of the file
+        headers["If-Match"] = etag
+    with session.get(url, headers=headers, stream=True) as result:
+        result.raise_for_status()
+        if result.status_code != 206:
+            raise requests.HTTPError(f"Expected a partial response for range {start}-{end}", response=result)
+        offset = start
+        for chunk in result.iter_content(chunk_size=_DOWNLOAD_CHUNK_SIZE):
+            os.pwrite(fd, chunk, offset)
+            offset += len(chunk)
+
+    if offset != end + 1:
+        raise requests.HTTPError(f"Incomplete download of range {start}-{end}", response=result)
+
+
 def get_metadata(
-    metadata_path: Path | None = None, metadata_url: str | None = None, num_rows: int | None = None
+    metadata_path: Path | None = None,
+    metadata_url: str | None = None,
+    num_rows: int | None = None,
+    cache_dir: Path | None = None,
 ) -> pl.LazyFrame:
     """
     Read GenBank SARS-CoV-2 genome metadata into a Polars LazyFrame.
@@ -82,6 +282,11 @@ def get_metadata(
     num_rows : int | None, default = None
         The number of genome metadata rows to request.
         When not supplied, request all rows.
+    cache_dir : Path | None, default = None
+        Optional. A directory for caching metadata read from metadata_path
+        as a Parquet file. When supplied, later calls for the same, unmodified
+        file scan the cache instead of decompressing and parsing the file
+        again. Not used with metadata_url.
     """
 
     path_flag = metadata_path is not None
@@ -93,39 +298,154 @@ def get_metadata(
         # get sequence metadata from a URL
         file_suffix = Path(urlparse(metadata_url).path).suffix
         if file_suffix in [".tsv", ".zst"]:
-            metadata = pl.scan_csv(metadata_url, separator="\t", n_rows=num_rows, infer_schema_length=100000)
+            metadata = pl.scan_csv(
+                metadata_url,
+                separator="\t",
+                n_rows=num_rows,
+                infer_schema_length=100000,
+                schema_overrides=_METADATA_SCHEMA_OVERRIDES,
+            )
         elif file_suffix == ".xz":
             # pytyon's lzma module doesn't support opening via HTTP, so use requests
             # to download the file in chunks and then decompress it
             with requests.get(metadata_url, stream=True) as response:
                 response.raise_for_status()
-                decompressor = lzma.LZMADecompressor()
-                buffer = BytesIO()
-                for chunk in response.iter_content(chunk_size=24576):
-                    if chunk:
-                        decompressed_chunk = decompressor.decompress(chunk)
-                        buffer.write(decompressed_chunk)
-                buffer.seek(0)
-                metadata = pl.scan_csv(buffer, separator="\t", n_rows=num_rows, infer_schema_length=100000)
+                # read the raw stream directly in large blocks (iter_content would re-chunk it)
+                response.raw.decode_content = True
+                buffer = _decompress_xz(response.raw)
+                metadata = pl.scan_csv(
+                    buffer,
+                    separator="\t",
+                    n_rows=num_rows,
+                    infer_schema_length=100000,
+                    schema_overrides=_METADATA_SCHEMA_OVERRIDES,
+                )
         else:
             raise ValueError(f"Unsupported compression type: {file_suffix}")
 
         return metadata
 
     if metadata_path:
+        if cache_dir is not None:
+            cache_file = _get_metadata_cache_file(metadata_path, cache_dir, num_rows)
+            if cache_file.exists():
+                logger.info("Using cached sequence metadata", path=cache_file)
+                return pl.scan_parquet(cache_file)
+
         # get sequence metadata from a file on local disk
-        if (compression_type := metadata_path.suffix) in [".tsv", ".zst"]:
-            metadata = pl.scan_csv(metadata_path, separator="\t", n_rows=num_rows)
-        elif compression_type == ".xz":
-            metadata = pl.read_csv(
-                lzma.open(metadata_path), separator="\t", n_rows=num_rows, infer_schema_length=100000
-            ).lazy()
+        if (compression_type := metadata_path.suffix) == ".tsv":
+            metadata = pl.scan_csv(
+                metadata_path, separator="\t", n_rows=num_rows, schema_overrides=_METADATA_SCHEMA_OVERRIDES
+            )
+        elif compression_type in [".xz", ".zst"]:
+            with open(metadata_path, "rb") as f:
+                buffer = _decompress_xz(f) if compression_type == ".xz" else _decompress_zst(f)
+            metadata = pl.scan_csv(
+                buffer,
+                separator="\t",
+                n_rows=num_rows,
+                infer_schema_length=100000,
+                schema_overrides=_METADATA_SCHEMA_OVERRIDES,
+            )
         else:
             raise ValueError(f"Unsupported compression type: {compression_type}")
 
+        if cache_dir is not None:
+            # Parquet is columnar and compressed, so later reads can skip both the
+            # decompression and the CSV parse, and push projections and filters into the scan
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            # write to a temporary name first, so an interrupted write never looks like a valid cache
+            partial_cache_file = cache_file.with_suffix(".parquet.partial")
+            if compression_type == ".tsv":
+                # stream the file straight to Parquet without collecting it in memory
+                metadata.sink_parquet(partial_cache_file, compression="zstd", compression_level=3)
+            else:
+                # scans of an in-memory buffer can't be streamed by sink_parquet
+                metadata.collect().write_parquet(partial_cache_file, compression="zstd", compression_level=3)
+            partial_cache_file.replace(cache_file)
+            logger.info("Cached sequence metadata", path=cache_file)
+            _remove_stale_metadata_cache_files(cache_file)
+            metadata = pl.scan_parquet(cache_file)
+
     return metadata
 
 
+def _get_metadata_cache_file(metadata_path: Path, cache_dir: Path, num_rows: int | None) -> Path:
+    """Return the Parquet cache location for a metadata file, keyed on the file's identity and modification time.
+
+    The file name starts with a hash of the metadata file's path, so older cache
+    entries for the same file can be found and removed.
+    """
+    stat = metadata_path.stat()
+    path_key = hashlib.sha1(str(metadata_path.resolve()).encode()).hexdigest()[:16]
+    version_key = hashlib.sha1(f"{stat.st_mtime_ns}-{stat.st_size}-{num_rows}".encode()).hexdigest()
+    return cache_dir / f"metadata-{path_key}-{version_key}.parquet"
+
+
+def _remove_stale_metadata_cache_files(cache_file: Path):
+    """Delete cache entries for the same metadata file as cache_file, other than cache_file itself."""
+    path_key = cache_file.stem.split("-")[1]
+    for stale_cache_file in cache_file.parent.glob(f"metadata-{path_key}-*.parquet"):
+        if stale_cache_file != cache_file:
+            stale_cache_file.unlink(missing_ok=True)
+            logger.info("Removed stale sequence metadata cache", path=stale_cache_file)
+
+
+def _decompress_xz(source: BinaryIO | BaseHTTPResponse) -> BytesIO:
+    """Decompress an .xz stream into an in-memory buffer.
+
+    The source is read in _DOWNLOAD_CHUNK_SIZE blocks, and output is requested
+    in blocks of up to _XZ_MAX_OUTPUT bytes, so the decoder fills one large
+    preallocated buffer per call instead of growing many small ones. Like
+    lzma.open, concatenated .xz streams are all decompressed, and trailing
+    data after the first stream that isn't a valid stream is ignored.
+
+    Raises
+    ------
+    EOFError
+        If the source ends before the end-of-stream marker is reached
+    """
+    decompressor = lzma.LZMADecompressor()
+    buffer = BytesIO()
+    while True:
+        if decompressor.eof:
+            # data left over after a complete stream is the start of the next one
+            chunk = decompressor.unused_data or source.read(_DOWNLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            decompressor = lzma.LZMADecompressor()
+            try:
+                data = decompressor.decompress(chunk, max_length=_XZ_MAX_OUTPUT)
+            except lzma.LZMAError:
+                # trailing garbage after the last stream
+                break
+        else:
+            if decompressor.needs_input:
+                chunk = source.read(_DOWNLOAD_CHUNK_SIZE)
+                if not chunk:
+                    raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+            else:
+                # drain any output that didn't fit in the last call before reading more input
+                chunk = b""
+            data = decompressor.decompress(chunk, max_length=_XZ_MAX_OUTPUT)
+        buffer.write(data)
+    buffer.seek(0)
+    return buffer
+
+
+def _decompress_zst(source: BinaryIO) -> BytesIO:
+    """Decompress a .zst stream into an in-memory buffer.
+
+    Reads and writes use 128 KB blocks, the input and output sizes that zstd
+    recommends for streaming, rather than Polars' internal decompression.
+    """
+    decompressor = zstd.ZstdDecompressor(max_window_size=_ZSTD_MAX_WINDOW_SIZE)
+    buffer = BytesIO()
+    decompressor.copy_stream(source, buffer, read_size=_DOWNLOAD_CHUNK_SIZE, write_size=_DOWNLOAD_CHUNK_SIZE)
+    buffer.seek(0)
+    return buffer
+
+
 def _get_ncov_metadata(
     url_ncov_metadata: str,
     session: Session | None = None,
@@ -252,46 +572,50 @@ def filter_metadata(
             "host",
         ]
 
-    # There are some other odd divisions in the data, but these are 50 states, DC and PR
-    states = [state.name for state in us.states.STATES]
-    states.extend(["Washington DC", "District of Columbia", "Puerto Rico"])
+    # parsing date strings with an explicit format is much faster than a generic cast,
+    # but only applies to metadata whose dates haven't already been parsed
+    if metadata.collect_schema()["date"] in (pl.String, pl.Categorical):
+        parsed_date = pl.col("date").str.to_date("%Y-%m-%d", strict=False)
+    else:
+        parsed_date = pl.col("date").cast(pl.Date, strict=False)
 
-    # Filter dataset and do some general tidying
+    # Filter dataset and do some general tidying. The cheap equality filters come
+    # first (ahead of the column selection) so they can be pushed down to the scan
+    # and discard most rows before the remaining columns are materialized.
     filtered_metadata = (
-        metadata.select(cols)
-        .filter(
+        metadata.filter(
             pl.col("country") == "USA",
-            pl.col("division").is_in(states),
             pl.col("host") == "Homo sapiens",
         )
+        .filter(pl.col("division").is_in(_US_DIVISIONS))
+        .select(cols)
+        # return plain strings, even if the caller's metadata has categorical columns
+        .with_columns(pl.col(pl.Categorical).cast(pl.String))
         .rename({"clade_nextstrain": "clade"})
-        .cast({"date": pl.Date}, strict=False)
+        .with_columns(parsed_date)
         # date filtering at the end ensures we filter out null
-        # values created by the above .cast operation
+        # values created by the above date parsing
         .filter(
             pl.col("date").is_not_null(),
         )
     )
 
-    # Apply filters for min and max sequence collection date, if applicable
+    # Apply filters for min and max sequence collection date, if applicable. The bounds
+    # are plain dates: comparing to a datetime would cast every value in the date column.
     if collection_min_date is not None:
-        collection_min_date = _get_date(collection_min_date).replace(hour=0, minute=0, second=0)
-        filtered_metadata = filtered_metadata.filter(pl.col("date") >= collection_min_date)
+        min_date = _get_date(collection_min_date).date()
+        filtered_metadata = filtered_metadata.filter(pl.col("date") >= min_date)
     if collection_max_date is not None:
-        collection_max_date = _get_date(collection_max_date).replace(hour=0, minute=0, second=0)
-        filtered_metadata = filtered_metadata.filter(pl.col("date") <= collection_max_date)
+        max_date = _get_date(collection_max_date).date()
+        filtered_metadata = filtered_metadata.filter(pl.col("date") <= max_date)
 
-    # Create state mappings based on state_format parameter, including a DC alias, since
-    # Nextrain's metadata uses a different name than the us package
+    # Create state mappings based on state_format parameter
     if state_format == StateFormat.FIPS:
-        state_dict = {state.name: state.fips for state in us.states.STATES_AND_TERRITORIES}
-        state_dict["Washington DC"] = us.states.DC.fips
+        state_dict = {name: fips for name, _, fips in _US_STATES}
     elif state_format == StateFormat.ABBR:
-        state_dict = {state.name: state.abbr for state in us.states.STATES_AND_TERRITORIES}
-        state_dict["Washington DC"] = us.states.DC.abbr
+        state_dict = {name: abbr for name, abbr, _ in _US_STATES}
     else:
-        state_dict = {state.name: state.name for state in us.states.STATES_AND_TERRITORIES}
-        state_dict["Washington DC"] = "Washington DC"
+        state_dict = {name: name for name, _, _ in _US_STATES}
 
     filtered_metadata = filtered_metadata.with_columns(pl.col("division").replace(state_dict).alias("location")).drop(
         "division"
@@ -306,17 +630,13 @@ def get_clade_counts(filtered_metadata: pl.LazyFrame) -> pl.LazyFrame:
     Notes:
     ------
     Deprecated in favor of summarize_clades
-    """
 
-    cols = [
-        "clade",
-        "country",
-        "date",
-        "location",
-        "host",
-    ]
+    The group_by is evaluated lazily. For metadata that is larger than memory,
+    collect the result with Polars' streaming engine (for example,
+    ``counts.collect(streaming=True)``) so the aggregation runs in batches.
+    """
 
-    counts = filtered_metadata.select(cols).group_by("location", "date", "clade").agg(pl.len().alias("count"))
+    counts = filtered_metadata.group_by("location", "date", "clade").agg(pl.len().alias("count"))
 
     return counts
 
@@ -350,9 +670,7 @@ def summarize_clades(sequence_metadata: pl.LazyFrame, group_by: list | None = No
     if group_by is None:
         group_by = ["clade_nextstrain", "country", "date", "location", "host"]
 
-    counts = (
-        sequence_metadata.select(group_by).group_by(group_by).agg(pl.len().alias("count")).cast({"count": pl.UInt32})
-    )
+    counts = sequence_metadata.group_by(group_by).agg(pl.len().alias("count")).cast({"count": pl.UInt32})
 
     return counts
 
@@ -393,10 +711,8 @@ def get_metadata_ids(sequence_metadata: pl.DataFrame | pl.LazyFrame) -> set:
 def parse_sequence_assignments(df_assignments: pl.DataFrame) -> pl.DataFrame:
     """Parse out the sequence number from the seqName column returned by the clade assignment tool."""
 
-    # polars apparently can't split out the sequence number from that big name column
-    # without resorting an apply, so here we're dropping into pandas to do that
-    # (might be a premature optimization, since this manoever requires both pandas and pyarrow)
-    seq = pl.from_pandas(df_assignments.to_pandas()["seqName"].str.split(" ").str[0].rename("seq"))
+    # the sequence number is everything before the first space in seqName
+    seq = df_assignments.get_column("seqName").str.split(" ").list.first().rename("seq")
 
     # we're expecting one row per sequence
     if seq.n_unique() != df_assignments.shape[0]:
@@ -17,7 +17,6 @@ from cladetime.util.reference import (
     _get_nextclade_dataset,
     _get_s3_object_url,
 )
-from cladetime.util.sequence import _get_ncov_metadata
 
 logger = structlog.get_logger()
 
@@ -144,7 +143,8 @@ class Tree:
             logger.error("Reference tree not available", tree_as_of=self.clade_time.tree_as_of)
             raise TreeNotAvailableError(f"Reference tree not available for {self.clade_time.tree_as_of}")
 
-        ncov_metadata = _get_ncov_metadata(url_ncov_metadata)
+        # use the metadata fetched when the Tree was created rather than requesting it again
+        ncov_metadata = self._ncov_metadata
         nextclade_dataset_name = ncov_metadata.get("nextclade_dataset_name_full")
         nextclade_dataset_version = ncov_metadata.get("nextclade_dataset_version")
 
@@ -173,19 +173,24 @@ class Tree:
             logger.error("Reference tree not available", tree_as_of=self.as_of)
             raise TreeNotAvailableError(f"Reference tree not available for {self.as_of}")
 
-        nextclade_version_num = self.ncov_metadata.get("nextclade_version_num", "")
-        nextclade_dataset_name = self.ncov_metadata.get("nextclade_dataset_name", "")
-        nextclade_dataset_version = self.ncov_metadata.get("nextclade_dataset_version", "")
+        # ncov_metadata is requested from S3 on every access, so use the copy fetched
+        # when the Tree was created
+        ncov_metadata = self._ncov_metadata
+        nextclade_version_num = ncov_metadata.get("nextclade_version_num", "")
+        nextclade_dataset_name = ncov_metadata.get("nextclade_dataset_name", "")
+        nextclade_dataset_version = ncov_metadata.get("nextclade_dataset_version", "")
         if not all([nextclade_version_num, nextclade_dataset_name, nextclade_dataset_version]):
             logger.error("Incomplete ncov metadata", tree_as_of=self._clade_time.tree_as_of)
-            raise TreeNotAvailableError(f"Incomplete ncov metadata {self.ncov_metadata}")
+            raise TreeNotAvailableError(f"Incomplete ncov metadata {ncov_metadata}")
 
         with tempfile.TemporaryDirectory() as tmpdir:
             nextclade_dataset = _get_nextclade_dataset(
                 nextclade_version_num, nextclade_dataset_name.lower(), nextclade_dataset_version, Path(tmpdir)
             )
-            zip = zipfile.ZipFile(str(nextclade_dataset))
-            with zip.open("tree.json") as tree_file:
-                tree = json.loads(tree_file.read())
+            # only the tree is needed, so inflate that one member straight from the
+            # archive rather than extracting the dataset
+            with zipfile.ZipFile(nextclade_dataset) as dataset_zip:
+                with dataset_zip.open(self._tree_name) as tree_file:
+                    tree = json.load(tree_file)
 
         return tree
@@ -1,5 +1,6 @@
 from datetime import datetime, timezone
 from pathlib import Path
+from unittest.mock import patch
 
 import boto3
 import pytest
@@ -112,6 +113,42 @@ def s3_setup(moto_file_path, s3_object_keys):
         yield s3_client, bucket_name, s3_object_keys
 
 
+@pytest.fixture
+def sequences_xz_url(s3_setup) -> str:
+    """Return a presigned URL for the mock S3 sequences.fasta.xz object."""
+    s3_client, bucket_name, s3_object_keys = s3_setup
+    return s3_client.generate_presigned_url(
+        "get_object",
+        Params={"Bucket": bucket_name, "Key": s3_object_keys["sequences_xz"]},
+        ExpiresIn=3600,
+    )
+
+
+def _mock_s3_object_url(bucket_name, object_key, date):
+    return "1", f"https://{bucket_name}.s3.amazonaws.com/{object_key}?versionId=1"
+
+
+@pytest.fixture
+def ncov_metadata():
+    return {
+        "nextclade_dataset_name": "SARS-CoV-2",
+        "nextclade_dataset_name_full": "nextstrain/sars-cov-2/wuhan-hu-1/orfs",
+        "nextclade_dataset_version": "2024-07-17--12-57-03Z",
+        "nextclade_version_num": "3.8.2",
+    }
+
+
+@pytest.fixture
+def mock_ncov_metadata(ncov_metadata):
+    """Mock the S3 lookups and ncov metadata requests made by CladeTime and Tree."""
+    with (
+        patch("cladetime.cladetime._get_s3_object_url", side_effect=_mock_s3_object_url),
+        patch("cladetime.tree._get_s3_object_url", side_effect=_mock_s3_object_url),
+        patch("cladetime.sequence._get_ncov_metadata", return_value=ncov_metadata) as mock_get_ncov_metadata,
+    ):
+        yield mock_get_ncov_metadata
+
+
 @pytest.fixture
 def test_config(s3_setup):
     """
@@ -1,8 +1,10 @@
 from datetime import datetime, timezone
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 from urllib.parse import parse_qs, urlparse
 
 import dateutil.tz
+import polars as pl
 import pytest
 from freezegun import freeze_time
 
@@ -10,6 +12,35 @@ from cladetime.cladetime import CladeTime
 from cladetime.exceptions import CladeTimeDateWarning, CladeTimeInvalidURLError
 
 
+@pytest.fixture
+def mock_assignment_steps(tmp_path):
+    """Mock the sequence filter, Nextclade dataset, and clade assignment steps of assign_clades."""
+    assignment_file = tmp_path / "clade_assignments.tsv"
+    pl.DataFrame({"seqName": ["A1", "A2"], "clade_nextstrain": ["24A", None]}).write_csv(
+        assignment_file, separator="\t"
+    )
+    with (
+        patch("cladetime.sequence.filter", return_value=Path("sequences_filtered.fasta")) as mock_filter,
+        patch("cladetime.cladetime._get_nextclade_dataset", return_value=Path("dataset.zip")) as mock_dataset,
+        patch("cladetime.cladetime._get_clade_assignments", return_value=assignment_file) as mock_assignments,
+    ):
+        yield mock_filter, mock_dataset, mock_assignments
+
+
+@pytest.fixture
+def test_sequence_metadata():
+    return pl.LazyFrame(
+        {
+            "strain": ["A1", "A2"],
+            "date": ["2024-08-01", "2024-08-02"],
+            "country": ["USA", "USA"],
+            "location": ["MA", "MA"],
+            "host": ["Homo sapiens", "Homo sapiens"],
+            "clade_nextstrain": ["AAA", "BBB"],
+        }
+    )
+
+
 def test_cladetime_no_args():
     with freeze_time("2024-12-13 16:21:34", tz_offset=-4):
         ct = CladeTime()
@@ -193,3 +224,48 @@ def test_cladetime_sequence_metadata_no_url(test_config):
 
     with pytest.raises(CladeTimeInvalidURLError):
         ct.sequence_metadata
+
+
+def test_assign_clades_concurrent_steps(mock_ncov_metadata, mock_assignment_steps, test_sequence_metadata, tmp_path):
+    mock_filter, mock_dataset, mock_assignments = mock_assignment_steps
+    output_file = tmp_path / "clade_assignments.tsv"
+
+    ct = CladeTime()
+    clades = ct.assign_clades(test_sequence_metadata, output_file=output_file)
+
+    # the sequence filter and Nextclade dataset download share a temporary directory
+    mock_filter.assert_called_once()
+    ids, url_sequence, tmpdir = mock_filter.call_args.args
+    assert ids == {"A1", "A2"}
+    assert url_sequence == ct.url_sequence
+    mock_dataset.assert_called_once_with("3.8.2", "sars-cov-2", "2024-07-17--12-57-03Z", tmpdir)
+
+    # and both of their results are used for clade assignment
+    mock_assignments.assert_called_once_with("3.8.2", mock_filter.return_value, mock_dataset.return_value, output_file)
+    assert clades.meta["sequences_to_assign"] == 2
+    assert clades.meta["sequences_assigned"] == 1
+
+
+@pytest.mark.parametrize("failed_step", [0, 1])
+def test_assign_clades_concurrent_step_error(
+    mock_ncov_metadata, mock_assignment_steps, test_sequence_metadata, tmp_path, failed_step
+):
+    # an exception in either the sequence filter or the Nextclade dataset download is raised
+    mock_assignment_steps[failed_step].side_effect = RuntimeError("step failed")
+    mock_assignments = mock_assignment_steps[2]
+
+    ct = CladeTime()
+    with pytest.raises(RuntimeError, match="step failed"):
+        ct.assign_clades(test_sequence_metadata, output_file=tmp_path / "clade_assignments.tsv")
+
+    mock_assignments.assert_not_called()
+
+
+def test_assign_clades_ncov_metadata_requests(
+    mock_ncov_metadata, mock_assignment_steps, test_sequence_metadata, tmp_path
+):
+    ct = CladeTime()
+    ct.assign_clades(test_sequence_metadata, output_file=tmp_path / "clade_assignments.tsv")
+
+    # the ncov metadata is requested once, when assign_clades creates its Tree
+    assert mock_ncov_metadata.call_count == 1
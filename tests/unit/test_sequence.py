@@ -1,16 +1,22 @@
+import errno
 import lzma
-from datetime import datetime
+import os
+import time
+from datetime import date, datetime
+from io import BytesIO
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import polars as pl
 import pytest
+import requests
 import zstandard as zstd
 from Bio import SeqIO
 from polars.testing import assert_frame_equal
 
 from cladetime import sequence
 from cladetime.types import StateFormat
+from cladetime.util.session import _get_session
 
 
 @pytest.fixture
@@ -27,6 +33,18 @@ def df_assignments():
     )
 
 
+@pytest.fixture
+def test_genome_metadata():
+    return {
+        "date": ["2022-01-01", "2022-01-02", "2022-01-03"],
+        "host": ["Homo sapiens", "Homo sapiens", "Narwhals"],
+        "country": ["USA", "Argentina", "USA"],
+        "division": ["Alaska", "Maine", "Utah"],
+        "clade_nextstrain": ["AAA", "BBB", "CCC"],
+        "strain": ["A1", "A2", "B1"],
+    }
+
+
 @pytest.fixture
 def test_file_path() -> Path:
     """
@@ -54,6 +72,79 @@ def test_get_metadata(test_file_path, metadata_file):
     assert expected_cols.issubset(metadata_cols)
 
 
+@pytest.mark.parametrize("metadata_file", ["metadata.tsv.zst", "metadata.tsv.xz"])
+def test_get_metadata_collect(moto_file_path, metadata_file):
+    metadata = sequence.get_metadata(moto_file_path / metadata_file)
+
+    metadata_df = metadata.collect()
+    assert metadata_df.shape == (99373, 58)
+    assert metadata_df.select("strain").n_unique() == len(metadata_df)
+
+
+def test_get_metadata_combine_frames(moto_file_path):
+    # frames from separate reads can be combined, e.g., to compare metadata as of two dates
+    metadata_xz = sequence.get_metadata(moto_file_path / "metadata.tsv.xz")
+    metadata_zst = sequence.get_metadata(moto_file_path / "metadata.tsv.zst")
+
+    combined = pl.concat([metadata_xz, metadata_zst]).select("country", "division", "host").collect()
+    assert combined.schema == pl.Schema({"country": pl.String, "division": pl.String, "host": pl.String})
+
+    joined = metadata_xz.join(metadata_zst, on=["strain", "country"]).select("strain").collect()
+    assert len(joined) == 99373
+
+
+def test_get_metadata_cache(moto_file_path, tmp_path):
+    metadata_path = tmp_path / "metadata.tsv.zst"
+    metadata_path.write_bytes((moto_file_path / "metadata.tsv.zst").read_bytes())
+    cache_dir = tmp_path / "cache"
+
+    metadata = sequence.get_metadata(metadata_path, cache_dir=cache_dir).collect()
+    cache_files = list(cache_dir.glob("*.parquet"))
+    assert len(cache_files) == 1
+
+    # the second read comes from the cache
+    with patch("cladetime.sequence._decompress_zst") as mock_decompress:
+        cached_metadata = sequence.get_metadata(metadata_path, cache_dir=cache_dir).collect()
+    mock_decompress.assert_not_called()
+    assert_frame_equal(metadata, cached_metadata)
+
+    # modifying the metadata file invalidates the cache and replaces the old entry
+    os.utime(metadata_path, ns=(0, 0))
+    sequence.get_metadata(metadata_path, cache_dir=cache_dir)
+    new_cache_files = list(cache_dir.glob("*.parquet"))
+    assert len(new_cache_files) == 1
+    assert new_cache_files != cache_files
+
+
+def test_get_metadata_cache_tsv(test_file_path, tmp_path):
+    metadata_path = tmp_path / "test_metadata.tsv"
+    metadata_path.write_bytes((test_file_path / "test_metadata.tsv").read_bytes())
+    other_metadata_path = tmp_path / "other_metadata.tsv"
+    other_metadata_path.write_bytes(metadata_path.read_bytes())
+    cache_dir = tmp_path / "cache"
+
+    metadata = sequence.get_metadata(metadata_path, cache_dir=cache_dir).collect()
+    sequence.get_metadata(other_metadata_path, cache_dir=cache_dir)
+    assert_frame_equal(metadata, sequence.get_metadata(metadata_path).collect())
+
+    # cache entries for other metadata files are kept
+    os.utime(metadata_path, ns=(0, 0))
+    sequence.get_metadata(metadata_path, cache_dir=cache_dir)
+    assert len(list(cache_dir.glob("*.parquet"))) == 2
+
+
+def test_decompress_xz_concatenated_streams():
+    # like lzma.open, every stream in a concatenated .xz file is decompressed
+    source = BytesIO(lzma.compress(b"strain\tdate\n") + lzma.compress(b"A\t2024-09-01\n"))
+    assert sequence._decompress_xz(source).read() == b"strain\tdate\nA\t2024-09-01\n"
+
+
+def test_decompress_xz_truncated():
+    compressed = lzma.compress(b"strain\tdate\nA\t2024-09-01\n" * 1000)
+    with pytest.raises(EOFError):
+        sequence._decompress_xz(BytesIO(compressed[: len(compressed) // 2]))
+
+
 def test_get_metadata_url(s3_setup, test_file_path):
     """
     Test get_metadata when used with an S3 URL instead of a local file.
@@ -142,6 +233,30 @@ def test_filter_metadata():
     assert actual_schema == expected_schema
 
 
+def test_filter_metadata_categorical_input(test_genome_metadata):
+    # callers may pass metadata with categorical columns
+    lf_metadata = pl.LazyFrame(test_genome_metadata).cast(
+        {"country": pl.Categorical, "division": pl.Categorical, "host": pl.Categorical}
+    )
+    lf_filtered = sequence.filter_metadata(lf_metadata).collect()
+
+    assert lf_filtered["location"].to_list() == ["AK"]
+    assert lf_filtered.schema["country"] == pl.String
+    assert lf_filtered.schema["host"] == pl.String
+    assert lf_filtered.schema["location"] == pl.String
+
+
+def test_filter_metadata_cols_without_filter_columns(test_genome_metadata):
+    # country and host are used for filtering but don't need to be in the output
+    lf_metadata = pl.LazyFrame(test_genome_metadata)
+    lf_filtered = sequence.filter_metadata(
+        lf_metadata, cols=["clade_nextstrain", "date", "division", "strain"]
+    ).collect()
+
+    assert lf_filtered.columns == ["clade", "date", "strain", "location"]
+    assert lf_filtered["strain"].to_list() == ["A1"]
+
+
 @pytest.mark.parametrize(
     "min_date, max_date, expected_rows",
     [
@@ -170,6 +285,36 @@ def test_filter_metadata_dates(min_date, max_date, expected_rows):
     assert len(lf_filtered) == expected_rows
 
 
+@pytest.mark.parametrize(
+    "min_date, max_date, expected_dates",
+    [
+        (None, None, [date(2022, 1, 1), date(2022, 1, 3), date(2023, 12, 25)]),
+        (datetime(2022, 1, 2), None, [date(2022, 1, 3), date(2023, 12, 25)]),
+        (datetime(2022, 1, 2), datetime(2023, 1, 1), [date(2022, 1, 3)]),
+    ],
+)
+@pytest.mark.parametrize("date_type", [pl.Date, pl.Datetime])
+def test_filter_metadata_parsed_dates(date_type, min_date, max_date, expected_dates):
+    # metadata with an already-parsed date column is accepted as well as date strings
+    num_test_rows = 4
+    test_genome_metadata = {
+        "date": [date(2022, 1, 1), date(2022, 1, 3), date(2023, 12, 25), None],
+        "host": ["Homo sapiens"] * num_test_rows,
+        "country": ["USA"] * num_test_rows,
+        "division": ["Massachusetts"] * num_test_rows,
+        "clade_nextstrain": ["AAA"] * num_test_rows,
+        "strain": ["A1", "A2", "A3", "A4"],
+    }
+
+    lf_metadata = pl.LazyFrame(test_genome_metadata).cast({"date": date_type})
+    lf_filtered = sequence.filter_metadata(
+        lf_metadata, collection_min_date=min_date, collection_max_date=max_date
+    ).collect()
+
+    assert lf_filtered.schema["date"] == pl.Date
+    assert lf_filtered["date"].to_list() == expected_dates
+
+
 def test_filter_metadata_state_name():
     num_test_rows = 4
     test_genome_metadata = {
@@ -216,6 +361,26 @@ def test_filter_metadata_state_fips():
     assert locations == {"11", "25", "72"}
 
 
+@pytest.mark.parametrize(
+    "state_format, expected_locations",
+    [(StateFormat.ABBR, {"DC", "PR"}), (StateFormat.FIPS, {"11", "72"})],
+)
+def test_filter_metadata_dc_aliases(state_format, expected_locations):
+    num_test_rows = 3
+    test_genome_metadata = {
+        "date": ["2022-01-01"] * num_test_rows,
+        "host": ["Homo sapiens"] * num_test_rows,
+        "country": ["USA"] * num_test_rows,
+        "clade_nextstrain": ["AAA"] * num_test_rows,
+        "strain": ["A1"] * num_test_rows,
+        "division": ["Washington DC", "District of Columbia", "Puerto Rico"],
+    }
+
+    lf_filtered = sequence.filter_metadata(pl.LazyFrame(test_genome_metadata), state_format=state_format).collect()
+
+    assert set(lf_filtered["location"].to_list()) == expected_locations
+
+
 def test_get_metadata_ids():
     metadata = {
         "strain": ["A1", "A2", "A2", "A4"],
@@ -313,6 +478,29 @@ def test_filter_invalid_fasta_compression(test_file_path, tmpdir):
             sequence.filter(set(), "http://thisismocked.com/mocky.zip", tmpdir)
 
 
+def test_get_clade_counts():
+    # only the group_by columns are required
+    test_metadata = pl.LazyFrame(
+        {
+            "clade": ["11C", "11C", "22A"],
+            "date": ["2022-01-01", "2022-01-01", "2022-01-01"],
+            "location": ["UT", "UT", "UT"],
+        }
+    )
+
+    expected_counts = pl.LazyFrame(
+        {
+            "location": ["UT", "UT"],
+            "date": ["2022-01-01", "2022-01-01"],
+            "clade": ["11C", "22A"],
+            "count": [2, 1],
+        }
+    ).cast({"count": pl.UInt32})
+
+    counts = sequence.get_clade_counts(test_metadata)
+    assert_frame_equal(expected_counts, counts, check_row_order=False)
+
+
 def test_summarize_clades():
     test_metadata = pl.DataFrame(
         {
@@ -382,3 +570,107 @@ def test_summarize_clades_custom_group():
 
     summarized = sequence.summarize_clades(test_metadata, group_by=["clade_nextstrain"])
     assert_frame_equal(expected_summary, summarized, check_column_order=False, check_row_order=False)
+
+
+def test_download_from_url(sequences_xz_url, moto_file_path, tmp_path):
+    downloaded_file = sequence._download_from_url(_get_session(), sequences_xz_url, tmp_path)
+
+    assert downloaded_file == tmp_path / "sequences.fasta.xz"
+    assert downloaded_file.read_bytes() == (moto_file_path / "sequences.fasta.xz").read_bytes()
+
+
+def test_download_from_url_single_stream(sequences_xz_url, moto_file_path, tmp_path, monkeypatch):
+    # files smaller than the range size are downloaded with a single request
+    monkeypatch.setattr(sequence, "_DOWNLOAD_RANGE_SIZE", 1024 * 1024 * 1024)
+
+    downloaded_file = sequence._download_from_url(_get_session(), sequences_xz_url, tmp_path)
+
+    assert downloaded_file.read_bytes() == (moto_file_path / "sequences.fasta.xz").read_bytes()
+
+
+def test_download_from_url_range_failure(sequences_xz_url, tmp_path, monkeypatch):
+    # once a range fails, the ranges still queued are cancelled rather than downloaded
+    monkeypatch.setattr(sequence, "_DOWNLOAD_RANGE_SIZE", 1024 * 1024)
+    monkeypatch.setattr(sequence, "_DOWNLOAD_MAX_WORKERS", 1)
+
+    def download_range(session, url, fd, start, end, etag=None):
+        if start == 0:
+            raise requests.HTTPError("range failed")
+        time.sleep(0.1)
+
+    mock_download_range = MagicMock(side_effect=download_range)
+    with patch("cladetime.sequence._download_range", mock_download_range):
+        with pytest.raises(requests.HTTPError):
+            sequence._download_from_url(_get_session(), sequences_xz_url, tmp_path)
+
+    assert mock_download_range.call_count <= 2
+
+
+@pytest.mark.parametrize("size", [0, 1024])
+def test_preallocate_unsupported(tmp_path, monkeypatch, size):
+    # a filesystem that can't preallocate doesn't fail the download
+    def posix_fallocate(fd, offset, length):
+        raise OSError(errno.EOPNOTSUPP, "Operation not supported")
+
+    monkeypatch.setattr(os, "posix_fallocate", posix_fallocate, raising=False)
+    with open(tmp_path / "download", "wb") as f:
+        sequence._preallocate(f.fileno(), size)
+
+    assert (tmp_path / "download").stat().st_size == size
+
+
+def test_parse_sequence_assignments(df_assignments):
+    result = sequence.parse_sequence_assignments(df_assignments)
+
+    assert result.columns == ["seqName", "seq", "clade"]
+    assert result["seq"].to_list() == ["PP782799.1", "ABCDEFG", "12345678"]
+
+
+def test_parse_sequence_assignments_duplicates(df_assignments):
+    df_duplicates = pl.concat([df_assignments, df_assignments.head(1)])
+
+    with pytest.raises(ValueError):
+        sequence.parse_sequence_assignments(df_duplicates)
+
+
+def test_download_from_url_not_modified(sequences_xz_url, moto_file_path, tmp_path):
+    session = _get_session()
+
+    downloaded_file = sequence._download_from_url(session, sequences_xz_url, tmp_path)
+    etag_file = tmp_path / "sequences.fasta.xz.etag"
+    assert etag_file.exists()
+
+    # an unchanged file is not downloaded again
+    with patch.object(session, "get", wraps=session.get) as mock_get:
+        downloaded_file = sequence._download_from_url(session, sequences_xz_url, tmp_path)
+    assert mock_get.call_count == 0
+    assert etag_file.exists()
+    assert downloaded_file.read_bytes() == (moto_file_path / "sequences.fasta.xz").read_bytes()
+
+    # a stale ETag results in a new download
+    etag_file.write_text('"not-the-current-etag"')
+    downloaded_file.write_bytes(b"stale")
+    downloaded_file = sequence._download_from_url(session, sequences_xz_url, tmp_path)
+    assert downloaded_file.read_bytes() == (moto_file_path / "sequences.fasta.xz").read_bytes()
+    assert etag_file.read_text() != '"not-the-current-etag"'
+
+
+def test_download_from_url_not_modified_head_refused(sequences_xz_url, tmp_path):
+    # servers that refuse HEAD (e.g., a presigned GET URL) fall back to a conditional GET
+    session = _get_session()
+    downloaded_file = sequence._download_from_url(session, sequences_xz_url, tmp_path)
+    etag_file = tmp_path / "sequences.fasta.xz.etag"
+    etag = etag_file.read_text()
+    downloaded_file.write_bytes(b"local copy")
+
+    mock_head = MagicMock(status_code=403, ok=False, headers={})
+    mock_head.__enter__.return_value = mock_head
+    with patch.object(session, "head", return_value=mock_head):
+        with patch.object(session, "get", wraps=session.get) as mock_get:
+            downloaded_file = sequence._download_from_url(session, sequences_xz_url, tmp_path)
+
+    assert mock_get.call_count == 1
+    assert mock_get.call_args.kwargs["headers"] == {"If-None-Match": etag}
+    # the GET's 304 leaves the existing file in place and restores its ETag
+    assert downloaded_file.read_bytes() == b"local copy"
+    assert etag_file.read_text() == etag
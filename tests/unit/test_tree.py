@@ -0,0 +1,26 @@
+import json
+import zipfile
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from cladetime import Tree
+
+
+def test_tree_ncov_metadata_requests(mock_ncov_metadata, ncov_metadata, tmp_path):
+    def get_nextclade_dataset(nextclade_version_num, dataset_name, dataset_version, output_path):
+        dataset = output_path / "nextclade_dataset.zip"
+        with zipfile.ZipFile(dataset, "w") as dataset_zip:
+            dataset_zip.writestr("tree.json", json.dumps({"version": "v2"}))
+        return dataset
+
+    tree = Tree(
+        datetime(2024, 9, 1, tzinfo=timezone.utc), "https://nextstrain-data.s3.amazonaws.com/sequences.fasta.zst"
+    )
+    with patch("cladetime.tree._get_nextclade_dataset", side_effect=get_nextclade_dataset) as mock_dataset:
+        reference_tree = tree._get_reference_tree()
+
+    assert reference_tree == {"version": "v2"}
+    assert mock_dataset.call_args.args[:3] == ("3.8.2", "sars-cov-2", "2024-07-17--12-57-03Z")
+    assert tree.url.endswith(f"/{ncov_metadata['nextclade_dataset_version']}/tree.json")
+    # the ncov metadata is requested once, when the Tree is created
+    assert mock_ncov_metadata.call_count == 1